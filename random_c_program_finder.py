@@ -1,16 +1,24 @@
 import random
+import re
+import shutil
+import signal
 import string
 import subprocess
 import os
+import queue
+import threading
 import time
 import multiprocessing
-from multiprocessing import Pool, Manager
 import argparse
+import contextlib
+import bisect
+import functools
+import itertools
 import math
-import uuid
+import tempfile
 
-# C program template with common headers
-C_TEMPLATE = '''
+# Common headers, kept separate so they can be precompiled once per run
+C_HEADERS = '''
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -33,13 +41,21 @@ C_TEMPLATE = '''
 #include <pthread.h>
 #include <dirent.h>
 #include <termios.h>
+'''
 
+C_MAIN = '''
 int main(int argc, char **argv) {
 %s
     return 0;
 }
 '''
 
+# C program template with common headers
+C_TEMPLATE = C_HEADERS + C_MAIN
+
+# The template as bytes around the content, for writing saved programs directly
+C_TEMPLATE_PREFIX, C_TEMPLATE_SUFFIX = (part.encode() for part in C_TEMPLATE.split("%s"))
+
 def calculate_combinations(charset_size, length):
     """Calculate the number of possible combinations"""
     return charset_size ** length
@@ -73,74 +89,395 @@ def get_charset(include_lowercase=True, include_uppercase=True, include_digits=T
         charset += " \t\n"
     return charset
 
-def generate_random_c_content(size, charset):
-    """Generate random C code content of specified size"""
-    return ''.join(random.choice(charset) for _ in range(size))
+@functools.lru_cache(maxsize=None)
+def make_content_generator(charset):
+    """Build a generate(size) function specialized for the given charset"""
+    if not charset.isascii() or len(charset) > 256:
+        choices = random.choices
+        return lambda size: ''.join(choices(charset, k=size))
+    
+    # Random bytes are mapped onto the charset with bytes.translate, which runs in C
+    randbytes = random.randbytes
+    symbols = charset.encode("ascii")
+    usable = 256 - 256 % len(symbols)
+    table = symbols * (usable // len(symbols)) + bytes(256 - usable)
+    
+    if usable == 256:
+        # Power-of-two sized charsets divide 256 evenly, so every byte is usable
+        def generate(size):
+            return randbytes(size).translate(table).decode("ascii")
+        return generate
+    
+    # Bytes past the last whole copy of the charset are deleted to avoid modulo bias;
+    # drawing a little extra means one round is almost always enough
+    rejected = bytes(range(usable, 256))
+    def generate(size):
+        draw = size * 256 // usable + 8
+        content = randbytes(draw).translate(table, rejected)
+        while len(content) < size:
+            content += randbytes(draw).translate(table, rejected)
+        return content[:size].decode("ascii")
+    return generate
 
-def test_compilation(content, pid, compiler, output_dir, timeout=2):
-    """Test if the generated content compiles"""
-    unique_id = uuid.uuid4().hex[:8]
-    filename = f"successful_code_{pid}_{unique_id}"
-    c_file = os.path.join(output_dir, f"{filename}.c")
+# Constructs that can hide or supply brackets and quotes (directives, comments,
+# digraphs, trigraphs, raw strings, line splices); content containing them is never rejected early
+OPAQUE_MARKERS = ("#", "/*", "//", "<%", "%>", "<:", ":>", "%:", "??", 'R"')
+# Splices are joined before escapes are read, and gcc allows whitespace between the backslash and newline
+LINE_SPLICE = r"\\[ \t\f\v\r]*\n"
+OPAQUE_PATTERN = re.compile("|".join([*map(re.escape, OPAQUE_MARKERS), LINE_SPLICE]))
+CLOSING_BRACKETS = {")": "(", "]": "[", "}": "{"}
+# Identifiers whose value depends on the enclosing function or line, so a batch would change them
+POSITIONAL_PATTERN = re.compile(r"__func__|__FUNCTION__|__PRETTY_FUNCTION__|__LINE__")
+# Characters the scan below reacts to; content without any of them is trivially contained
+STRUCTURAL_CHARS = frozenset("()[]{}'\"\\")
+
+def scan_content(content):
+    """Classify content by its brackets and quotes as "reject", "contained" or "unknown"
+
+    "reject" content certainly cannot compile inside the C template, "contained"
+    content never leaves the body of main(), anything else is "unknown".
+    """
+    # Both checks run in C, so most candidates never reach the Python loop
+    if OPAQUE_PATTERN.search(content) or POSITIONAL_PATTERN.search(content):
+        return "unknown"
+    if STRUCTURAL_CHARS.isdisjoint(content):
+        return "contained"
     
-    # Write to file
-    with open(c_file, "w") as f:
-        f.write(C_TEMPLATE % content)
+    # The template has already opened the body of main()
+    stack = ["{"]
+    contained = True
+    quote = None
+    escaped = False
+    previous = ""
+    for char in content:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            elif char == "\n":
+                return "reject"
+        elif char in "\"'":
+            # Could be a literal prefix (L, u8, ...) or a C23 digit separator
+            if previous.isalnum() or previous == "_":
+                return "unknown"
+            quote = char
+        elif char == "\\":
+            # Outside a literal this may be a line splice or a universal character name
+            return "unknown"
+        elif char in "([{":
+            stack.append(char)
+        elif char in CLOSING_BRACKETS:
+            if not stack or stack.pop() != CLOSING_BRACKETS[char]:
+                return "reject"
+            if not stack:
+                contained = False
+        previous = char
     
-    # Try to compile
+    # The template's closing brace must end up closing main() or whatever replaced it
+    if quote is not None or stack != ["{"]:
+        return "reject"
+    return "contained" if contained else "unknown"
+
+def use_tmpfs_for_scratch():
+    """Point temporary files (ours and the compiler's) at tmpfs unless TMPDIR is already set"""
+    if "TMPDIR" not in os.environ and os.path.isdir("/dev/shm"):
+        os.environ["TMPDIR"] = "/dev/shm"
+        tempfile.tempdir = "/dev/shm"
+
+def run_in_session(command, input_data, timeout, capture_errors=True):
+    """Run command in its own session, feeding input_data on stdin, and return (success, error_message)"""
     try:
-        result = subprocess.run([compiler, "-c", c_file], 
-                            stdout=subprocess.PIPE, 
-                            stderr=subprocess.PIPE,
-                            timeout=timeout,
-                            text=True,
-                            check=True)
-        success = True
-        error_message = ""
-    except subprocess.CalledProcessError as e:
-        success = False
-        error_message = e.stderr
-    except subprocess.TimeoutExpired:
-        success = False
-        error_message = "Compilation timed out"
+        process = subprocess.Popen(command,
+                                   stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE if capture_errors else subprocess.DEVNULL,
+                                   start_new_session=True)
     except Exception as e:
-        success = False
-        error_message = str(e)
+        return False, str(e)
+    
+    try:
+        _, stderr = process.communicate(input_data, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # The driver runs cc1 and as in its own process group, so kill them all with it
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.communicate()
+        return False, "Compilation timed out"
+    
+    if process.returncode == 0:
+        return True, ""
+    return False, (stderr or b"").decode(errors="replace")
+
+def precompile_headers(compiler, directory, timeout=60):
+    """Precompile C_HEADERS and return the flags that include them, or [] if unsupported"""
+    header = os.path.join(directory, "prelude.h")
+    with open(header, "w") as f:
+        f.write(C_HEADERS)
     
-    # Clean up
-    if not success and os.path.exists(c_file):
-        os.remove(c_file)
-    if os.path.exists(f"{filename}.o"):
-        os.remove(f"{filename}.o")
+    success, _ = run_in_session([compiler, "-x", "c-header", header, "-o", f"{header}.gch"],
+                                None, timeout, capture_errors=False)
+    if not success:
+        return []
     
-    return success, content, c_file if success else None, error_message
+    # The compiler picks up prelude.h.gch in place of the header itself
+    return ["-include", header]
+
+def run_compiler(source, compiler, timeout, header_flags, capture_errors=True):
+    """Compile source bytes and return (success, error_message)"""
+    # Compile from stdin and discard the object file, so nothing touches the disk.
+    # Diagnostics are only read and decoded when someone is going to look at them.
+    return run_in_session([compiler, *header_flags, "-x", "c", "-o", os.devnull, "-c", "-", "-pipe"],
+                          source, timeout, capture_errors)
+
+def make_source_layout(prologue, heads, tail, width):
+    """Lay out a reusable source buffer: the prologue, then head, a width-byte slot and tail per head
+
+    Returns (buffer, slot views, first line of each head, blank slot).
+    """
+    buffer = bytearray(prologue.encode())
+    offsets = []
+    first_lines = []
+    for head in heads:
+        first_lines.append(buffer.count(b"\n") + 1)
+        buffer += head.encode()
+        offsets.append(len(buffer))
+        buffer += b" " * width
+        buffer += tail.encode()
+    
+    view = memoryview(buffer)
+    return buffer, [view[offset:offset + width] for offset in offsets], first_lines, memoryview(b" " * width)
+
+def fill_source(layout, contents):
+    """Copy contents into the layout's slots, blanking the rest, and return (source, first lines)"""
+    buffer, slots, first_lines, blank = layout
+    
+    # Trailing spaces are harmless after any content; newlines in content push later lines down
+    content_lines = []
+    newlines = 0
+    for index, slot in enumerate(slots):
+        if index < len(contents):
+            encoded = contents[index].encode()
+            slot[:len(encoded)] = encoded
+            slot[len(encoded):] = blank[len(encoded):]
+            content_lines.append(first_lines[index] + newlines)
+            newlines += encoded.count(b"\n")
+        else:
+            slot[:] = blank
+    return buffer, content_lines
+
+def single_layout(width, header_flags):
+    """Build the source layout for compiling one candidate alone"""
+    if not header_flags:
+        head, tail = C_TEMPLATE.split("%s")
+        return make_source_layout("", [head], tail, width)
+    
+    # Number C_MAIN as it sits in the saved C_TEMPLATE, so __LINE__ and diagnostics agree with it
+    head, tail = C_MAIN.split("%s")
+    return make_source_layout(f"#line {C_HEADERS.count(chr(10)) + 1}\n", [head], tail, width)
+
+def unique_ids():
+    """Yield file ids unique within this process: a random token drawn once plus a counter"""
+    token = os.urandom(4).hex()
+    for number in itertools.count():
+        yield f"{token}{number:x}"
+
+def test_compilation(content, pid, compiler, output_dir, timeout=2, header_flags=(), capture_errors=True, layout=None,
+                     file_ids=None):
+    """Test if the generated content compiles"""
+    if layout is None:
+        layout = single_layout(len(content.encode()), header_flags)
+    source, _ = fill_source(layout, [content])
+    success, error_message = run_compiler(source, compiler, timeout, header_flags, capture_errors)
+    
+    # Only successful programs are written out, with a single scatter-gather write
+    c_file = None
+    if success:
+        unique_id = next(file_ids if file_ids is not None else unique_ids())
+        filename = f"successful_code_{pid}_{unique_id}"
+        c_file = os.path.join(output_dir, f"{filename}.c")
+        fd = os.open(c_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            os.writev(fd, [C_TEMPLATE_PREFIX, content.encode(), C_TEMPLATE_SUFFIX])
+        finally:
+            os.close(fd)
+    
+    return success, content, c_file, error_message
+
+# Each batched candidate gets a function of its own; main is declared so candidates can still refer to it
+C_BATCH_PROLOGUE = "int main(int argc, char **argv);\n"
+C_BATCH_FUNCTION = '''int candidate_%d(int argc, char **argv) {
+%s
+    return 0;
+}
+'''
+BATCH_DIAGNOSTIC_LINE = re.compile(r"^<stdin>:(\d+):(?:\d+:)? (?:fatal )?(error|warning|note): (.*)$", re.MULTILINE)
 
-def worker(args):
-    """Worker process function"""
-    task_id, counter_lock, successful_count, total_count, byte_size, charset, compiler, output_dir, show_errors = args
+def batch_layout(width, batch_size, header_flags):
+    """Build the source layout for compiling up to batch_size candidates together"""
+    prologue = C_BATCH_PROLOGUE if header_flags else C_HEADERS + C_BATCH_PROLOGUE
+    head, tail = C_BATCH_FUNCTION.split("%s")
+    return make_source_layout(prologue, [head % index for index in range(batch_size)], tail, width)
+
+def compile_batch(contents, compiler, timeout, header_flags, layout=None):
+    """Compile many candidates in one run, returning (error messages of failures, untested rest)"""
+    if layout is None:
+        layout = batch_layout(max(len(content.encode()) for content in contents), len(contents), header_flags)
+    source, first_lines = fill_source(layout, contents)
+    
+    success, error_message = run_compiler(source, compiler, timeout, header_flags)
+    if success:
+        return [], contents
+    
+    # Candidates that report errors inside their own function failed; the others
+    # still have to be compiled alone, as the batch cannot vouch for them
+    errors = {}
+    clashing = set()
+    current = None
+    for match in BATCH_DIAGNOSTIC_LINE.finditer(error_message):
+        index = bisect.bisect_right(first_lines, int(match.group(1))) - 1
+        kind = match.group(2)
+        if kind == "error":
+            current = index
+            if index >= 0:
+                errors.setdefault(index, []).append(match.group(0))
+        elif kind == "note" and current is not None and current >= 0 and index != current:
+            # Declarations share linkage across the batch, so an error that points at
+            # another candidate (or the prologue) says nothing about this one compiled alone
+            clashing.add(current)
+        elif kind == "warning":
+            current = None
+    
+    failures = ["\n".join(lines) for index, lines in errors.items() if index not in clashing]
+    untested = [content for index, content in enumerate(contents) if index not in errors or index in clashing]
+    return failures, untested
+
+# Per-process settings, filled in once by init_worker when the pool starts
+_byte_size = None
+_generate = None
+_compiler = None
+_output_dir = None
+_timeout = None
+_header_flags = None
+_show_errors = None
+_single_layout = None
+_batch_layout = None
+_file_ids = None
+
+def init_worker(byte_size, charset, compiler, output_dir, timeout, header_flags, show_errors, batch_size):
+    """Store the run settings in the worker so tasks only carry their size"""
+    global _byte_size, _generate, _compiler, _output_dir, _timeout, _header_flags, _show_errors
+    global _single_layout, _batch_layout, _file_ids
+    _byte_size = byte_size
+    _generate = make_content_generator(charset)
+    _compiler = compiler
+    _output_dir = output_dir
+    _timeout = timeout
+    _header_flags = header_flags
+    _show_errors = show_errors
+    
+    # Source buffers are laid out once and only their content slots are rewritten per attempt
+    width = byte_size * max(len(char.encode()) for char in charset)
+    _single_layout = single_layout(width, header_flags)
+    _batch_layout = batch_layout(width, batch_size, header_flags)
+    
+    # Seed once per process from the OS so forked workers never share a sequence
+    random.seed()
+    _file_ids = unique_ids()
+
+def split_attempts(count, batch_size):
+    """Split a number of attempts into worker task sizes"""
+    if count <= 0:
+        return []
+    tasks = [batch_size] * (count // batch_size)
+    if count % batch_size:
+        tasks.append(count % batch_size)
+    return tasks
+
+def worker(attempts):
+    """Worker process function, returns (attempts, saved files, error messages)
+
+    Each task is one batch: candidates that stay inside main() are compiled
+    together first, and only those the batch did not rule out are compiled alone.
+    """
     pid = os.getpid()
+    saved_files = []
+    error_messages = []
     
-    # Set different random seed for each process
-    random.seed(pid + task_id)
+    batch = []
+    alone = []
+    for _ in range(attempts):
+        content = _generate(_byte_size)
+        verdict = scan_content(content)
+        if verdict == "reject":
+            error_messages.append("Rejected before compiling: unbalanced brackets or quotes")
+        elif verdict == "contained":
+            batch.append(content)
+        else:
+            alone.append(content)
     
-    content = generate_random_c_content(byte_size, charset)
-    success, content, filename, error_message = test_compilation(content, pid, compiler, output_dir)
+    # Only content that stays inside its own function can share a compiler run
+    if len(batch) > 1:
+        batch_errors, batch = compile_batch(batch, _compiler, _timeout, _header_flags, layout=_batch_layout)
+        error_messages.extend(batch_errors)
+    alone.extend(batch)
     
-    with counter_lock:
-        total_count.value += 1
+    for content in alone:
+        success, content, filename, error_message = test_compilation(
+            content, pid, _compiler, _output_dir,
+            timeout=_timeout, header_flags=_header_flags, capture_errors=_show_errors,
+            layout=_single_layout, file_ids=_file_ids)
         if success:
-            successful_count.value += 1
-            print(f"Compilation successful! ({successful_count.value}/{total_count.value}) - Saved as {filename}")
-        elif show_errors:
-            # Print truncated error message if requested
-            print(f"Compilation failed: {error_message[:100]}..." if len(error_message) > 100 else f"Compilation failed: {error_message}")
-        
-        # Periodically print statistics
-        if total_count.value % 100 == 0:
-            success_rate = successful_count.value / total_count.value * 100
-            print(f"Progress: {total_count.value} attempts, {successful_count.value} successes ({success_rate:.2f}%)")
+            saved_files.append(filename)
+        else:
+            error_messages.append(error_message)
+    
+    if not _show_errors:
+        error_messages = []
+    return attempts, saved_files, error_messages
+
+@contextlib.contextmanager
+def background_printer():
+    """Yield a function that queues messages for a thread to print, so slow terminals never stall the caller"""
+    messages = queue.SimpleQueue()
+    
+    def print_messages():
+        for message in iter(messages.get, None):
+            print(message)
+    
+    thread = threading.Thread(target=print_messages, daemon=True)
+    thread.start()
+    try:
+        yield messages.put
+    finally:
+        # Flush whatever is still queued before anything else is printed
+        messages.put(None)
+        thread.join()
+
+def report_result(result, successful, total, emit=print):
+    """Print the outcome of one task and return the updated (successful, total) counts"""
+    attempts, saved_files, error_messages = result
+    
+    for error_message in error_messages:
+        # Print truncated error message if requested
+        emit(f"Compilation failed: {error_message[:100]}..." if len(error_message) > 100 else f"Compilation failed: {error_message}")
     
-    return success
+    previous_total = total
+    total += attempts
+    for filename in saved_files:
+        successful += 1
+        emit(f"Compilation successful! ({successful}/{total}) - Saved as {filename}")
+    
+    # Periodically print statistics
+    if total // 100 > previous_total // 100:
+        success_rate = successful / total * 100
+        emit(f"Progress: {total} attempts, {successful} successes ({success_rate:.2f}%)")
+    
+    return successful, total
 
 def main():
     # Parse command line arguments
@@ -155,8 +492,10 @@ def main():
     parser.add_argument('--no-symbols', action='store_true', help='Exclude symbols')
     parser.add_argument('--whitespace', action='store_true', help='Include whitespace characters')
     parser.add_argument('--charset', type=str, help='Custom character set to use (overrides other charset options)')
-    parser.add_argument('--compiler', type=str, default='gcc', help='Compiler to use (default: gcc)')
+    parser.add_argument('--compiler', type=str, default='gcc', help='Compiler to use (default: gcc, tcc is much faster for tiny inputs)')
     parser.add_argument('--show-errors', action='store_true', help='Show compilation error messages')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Attempts a worker compiles together in one compiler run (default: 64)')
     parser.add_argument('--timeout', type=int, default=2, help='Compilation timeout in seconds (default: 2)')
     parser.add_argument('--output-dir', type=str, default='successful_codes', help='Output directory for successful codes')
     args = parser.parse_args()
@@ -175,6 +514,14 @@ def main():
         print("Error: At least one character type must be included")
         return
     
+    if args.batch_size < 1:
+        print("Error: Batch size must be at least 1")
+        return
+    
+    if args.tasks < -1:
+        print("Error: Number of tasks must be -1 (unlimited) or at least 0")
+        return
+    
     # Calculate combinations
     charset_size = len(charset)
     combinations = calculate_combinations(charset_size, args.byte_size)
@@ -189,65 +536,81 @@ def main():
     cpu_count = multiprocessing.cpu_count()
     print(f"Available CPU cores: {cpu_count}")
     
-    # Shared variables
-    manager = Manager()
-    counter_lock = manager.Lock()
-    successful_count = manager.Value('i', 0)
-    total_count = manager.Value('i', 0)
+    # Counters are aggregated here from the results returned by the workers
+    successful = 0
+    total = 0
     
     start_time = time.time()
     
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Handle unlimited mode
-    if args.tasks == -1:
-        print("Running in unlimited task mode... (Press Ctrl+C to stop)")
+    # Workers and compilers inherit this, so any scratch files stay off the disk
+    use_tmpfs_for_scratch()
+    
+    # Resolve the compiler once so each spawn execs it directly instead of searching PATH
+    compiler = shutil.which(args.compiler) or args.compiler
+    
+    # Remove the scratch directory (and its multi-megabyte .gch) however the run ends
+    scratch_dir = tempfile.TemporaryDirectory(prefix="c_program_finder_")
+    try:
+        # Parse the common headers once instead of on every compilation
+        header_flags = precompile_headers(compiler, scratch_dir.name)
+        print(f"Precompiled headers: {'enabled' if header_flags else 'not supported by compiler'}")
         
-        task_id = 0
+        # fork starts workers without re-importing this module; fall back where it is unavailable
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
         
-        try:
-            with Pool(processes=cpu_count) as pool:
-                while True:
-                    # Create batch of tasks
-                    batch_size = cpu_count * 10
-                    tasks = [(task_id + i, counter_lock, successful_count, total_count, 
-                             args.byte_size, charset, args.compiler, args.output_dir, args.show_errors)
-                            for i in range(batch_size)]
-                    task_id += batch_size
-                    
-                    # Execute tasks asynchronously
-                    results = pool.map(worker, tasks)
-                    
-                    # Print progress
-                    elapsed = time.time() - start_time
-                    rate = total_count.value / elapsed if elapsed > 0 else 0
-                    print(f"Processing speed: {rate:.2f} per second (total: {total_count.value})")
-        
-        except KeyboardInterrupt:
-            print("\nStopped by user")
-    
-    else:
-        # Fixed number of tasks
-        tasks = [(i, counter_lock, successful_count, total_count, args.byte_size, 
-                 charset, args.compiler, args.output_dir, args.show_errors)
-                for i in range(args.tasks)]
+        pool_args = dict(processes=cpu_count, initializer=init_worker,
+                         initargs=(args.byte_size, charset, compiler, args.output_dir, args.timeout, header_flags, args.show_errors, args.batch_size))
         
-        try:
-            with Pool(processes=cpu_count) as pool:
-                for _ in pool.imap_unordered(worker, tasks):
-                    pass
+        # Handle unlimited mode
+        if args.tasks == -1:
+            print("Running in unlimited task mode... (Press Ctrl+C to stop)")
+            
+            try:
+                with context.Pool(**pool_args) as pool, background_printer() as emit:
+                    # Stream an endless supply of tasks so workers never wait on a batch barrier
+                    tasks = itertools.repeat(args.batch_size)
+                    
+                    # Each task is already --batch-size attempts, so one task per dispatch keeps
+                    # every core busy and results (and progress) flowing back as they finish
+                    for completed, result in enumerate(pool.imap_unordered(worker, tasks, chunksize=1), 1):
+                        successful, total = report_result(result, successful, total, emit)
+                        
+                        # Print progress about once per round of tasks
+                        if completed % cpu_count == 0:
+                            elapsed = time.time() - start_time
+                            rate = total / elapsed if elapsed > 0 else 0
+                            emit(f"Processing speed: {rate:.2f} per second (total: {total})")
+            
+            except KeyboardInterrupt:
+                print("\nStopped by user")
         
-        except KeyboardInterrupt:
-            print("\nStopped by user")
+        else:
+            # Fixed number of tasks
+            tasks = split_attempts(args.tasks, args.batch_size)
+            # Hand out tasks in chunks so the per-task IPC cost is amortized
+            chunksize = max(1, len(tasks) // (cpu_count * 8))
+            
+            try:
+                with context.Pool(**pool_args) as pool, background_printer() as emit:
+                    for result in pool.imap_unordered(worker, tasks, chunksize):
+                        successful, total = report_result(result, successful, total, emit)
+            
+            except KeyboardInterrupt:
+                print("\nStopped by user")
+    finally:
+        scratch_dir.cleanup()
     
     # Print results
     try:
         elapsed = time.time() - start_time
-        rate = total_count.value / elapsed if elapsed > 0 else 0
-        success_rate = successful_count.value / total_count.value * 100 if total_count.value > 0 else 0
+        rate = total / elapsed if elapsed > 0 else 0
+        success_rate = successful / total * 100 if total > 0 else 0
         
-        print(f"\nTask completed. Total: {total_count.value} attempts, {successful_count.value} successes ({success_rate:.2f}%)")
+        print(f"\nTask completed. Total: {total} attempts, {successful} successes ({success_rate:.2f}%)")
         print(f"Processing speed: {rate:.2f} per second")
         print(f"Time elapsed: {elapsed:.2f} seconds")
         
@@ -0,0 +1,81 @@
+import shutil
+
+import pytest
+
+import random_c_program_finder as finder
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc is not installed")
+
+
+@needs_gcc
+def test_batch_does_not_fail_candidates_on_cross_candidate_declarations():
+    contents = ['a();', 'char a();', 'extern int b;', 'extern char b;', 'extern long y;', 'y();']
+    for content in contents:
+        assert finder.run_compiler((finder.C_TEMPLATE % content).encode(), "gcc", 5, [])[0]
+    
+    failures, untested = finder.compile_batch(contents, "gcc", 5, [])
+    assert failures == []
+    assert untested == contents
+
+
+@needs_gcc
+def test_batch_still_fails_candidates_with_their_own_errors():
+    failures, untested = finder.compile_batch(['x;', ';', 'int a;int a;'], "gcc", 5, [])
+    assert len(failures) == 2
+    assert untested == [';']
+
+
+@pytest.mark.parametrize("content", ['(', ')(', '}', '(]', '"', "'", 'x="b\nc";', "'\\'"])
+def test_unbalanced_brackets_and_open_literals_are_rejected(content):
+    assert finder.scan_content(content) == "reject"
+
+
+@pytest.mark.parametrize("content", ['x;', 'a[0];', '(1);', '"\\"";', "'\\''"])
+def test_balanced_content_is_contained(content):
+    assert finder.scan_content(content) == "contained"
+
+
+@pytest.mark.parametrize("content", [
+    '"\\\n"";',
+    "'\\\n'';",
+    '"\\  \n"";',
+    '"\\\t\r\n"";',
+    '#define a (',
+    '/* ( */',
+    '// (',
+    '<%',
+    '??<',
+    'R"(',
+    'a"',
+    '\\u0028',
+    '}{',
+])
+def test_opaque_content_is_left_to_the_compiler(content):
+    assert finder.scan_content(content) == "unknown"
+
+
+@pytest.mark.parametrize("content", [
+    'char a[6-sizeof(__func__)];',
+    'char a[6-sizeof(__FUNCTION__)];',
+    'char a[6-sizeof(__PRETTY_FUNCTION__)];',
+    'int a[__LINE__-1];',
+])
+def test_positional_identifiers_are_not_batched(content):
+    assert finder.scan_content(content) == "unknown"
+
+
+@needs_gcc
+@pytest.mark.parametrize("content", ['int a[4-__LINE__];', 'int a[__LINE__-4];', 'int a[__LINE__-25];'])
+def test_precompiled_header_path_numbers_lines_like_the_saved_template(content, tmp_path):
+    header_flags = finder.precompile_headers("gcc", str(tmp_path))
+    assert header_flags
+    
+    saved = finder.run_compiler((finder.C_TEMPLATE % content).encode(), "gcc", 5, [])[0]
+    layout = finder.single_layout(len(content), header_flags)
+    source, _ = finder.fill_source(layout, [content])
+    assert finder.run_compiler(source, "gcc", 5, header_flags)[0] == saved
+
+
+@pytest.mark.parametrize("count, tasks", [(-5, []), (0, []), (64, [64]), (130, [64, 64, 2])])
+def test_split_attempts(count, tasks):
+    assert finder.split_attempts(count, 64) == tasks